@@ -1,10 +1,28 @@
 import requests
+import argparse
 import json
+import re
 import sqlite3
 import os
 import subprocess
 import codecs
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple
+
+try:
+  import orjson
+except ImportError:  # Optional (pip install .[fast]), fall back to stdlib json
+  orjson = None
+
+DOWNLOAD_CHUNK_SIZE = 1 << 16  # 64 KiB
+READ_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+# emoji-test.txt section headers
+GROUP_PREFIX = "# group:"
+SUBGROUP_PREFIX = "# subgroup:"
+# Code Points ; Status # Glyph Name
+EMOJI_LINE_RE = re.compile(r"^([0-9A-F ]+?)\s*;\s*(\S+)\s*#\s*(\S+)(?:\s+(.*))?$")
 
 # ************************************************************************** //
 #                             Download db Files                              //
@@ -12,16 +30,25 @@ import sys
 
 
 def download_file(url, filename):
+  # Messages are written in one call so concurrent downloads don't interleave
   if os.path.exists(filename):
-    print(f"File {filename} already exists. Skipping download.")
+    sys.stdout.write(f"File {filename} already exists. Skipping download.\n")
   else:
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
-    response = requests.get(url)
-    response.raise_for_status()  # Ensure we notice bad responses
-    with open(filename, "wb") as f:
-      f.write(response.content)
-    print(f"Downloaded {filename}")
+    # Stream the response to disk in chunks instead of buffering it in memory
+    with requests.get(
+      url, stream=True, allow_redirects=True, timeout=(10, 30)
+    ) as response:
+      response.raise_for_status()  # Ensure we notice bad responses
+      # Write to a temp file and rename, so an interrupted download never
+      # leaves a truncated file behind at the final path
+      part_filename = filename + ".part"
+      with open(part_filename, "wb") as f:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+          f.write(chunk)
+      os.replace(part_filename, filename)
+    sys.stdout.write(f"Downloaded {filename}\n")
 
 
 # ************************************************************************** //
@@ -29,74 +56,67 @@ def download_file(url, filename):
 # ************************************************************************** //
 
 
+class Emoji(NamedTuple):
+  # Tuple-backed entry: no per-instance __dict__, fields at fixed offsets
+  codepoints: List[str]
+  status: str
+  emoji: str
+  name: str
+
+
 def parse_emoji_test(filename):
-  emoji_db = {}  # Emoji Database
+  # Yield (group, subgroup, Emoji) events in file order, so consumers can
+  # stream entries without materializing the whole emoji database.
+  # Headers are emitted too, as (group, None, None) and (group, subgroup, None),
+  # so empty groups and subgroups are kept in the JSON export
   curr_group = None
   curr_subgroup = None
 
-  with open(filename, encoding="utf-8") as f:
+  with open(filename, encoding="utf-8", buffering=READ_BUFFER_SIZE) as f:
     for line in f:
       line = line.strip()
       if not line:
         continue
 
-      if line.startswith("#"):
-        if line.startswith("# group"):
-          curr_group = line.split(":", 1)[1].strip()  # Get the group name
-          if curr_group not in emoji_db:
-            emoji_db[curr_group] = {}  # Create the group
-        elif line.startswith("# subgroup"):
-          curr_subgroup = line.split(":", 1)[1].strip()  # Get the subgroup name
-          if curr_subgroup is not None:
-            emoji_db[curr_group][curr_subgroup] = []  # Create the subgroup
+      if line[0] == "#":
+        if len(line) < len(GROUP_PREFIX):
+          continue  # Bare "#" separators and short comments
+        if line.startswith(GROUP_PREFIX):
+          # Get the group name
+          curr_group = sys.intern(line[len(GROUP_PREFIX) :].strip())
+          curr_subgroup = None  # Subgroups don't carry over between groups
+          yield curr_group, None, None
+        elif line.startswith(SUBGROUP_PREFIX):
+          # Get the subgroup name
+          curr_subgroup = sys.intern(line[len(SUBGROUP_PREFIX) :].strip())
+          if curr_group:
+            yield curr_group, curr_subgroup, None
         continue
 
       # Process Emoji Entry
       # Expected format example:
       # 1F600                                      ; fully-qualified     # 😀 grinning face
-      try:
-        left, right = line.split("#", 1)  # Code Points
-        left = left.strip()  # Glyph & name
-        right = right.strip()
-
-        # Process Code Points & Status
-        parts = left.split(";")
-        if len(parts) < 2:
-          continue  # Skip invalid lines
-        codepoints_str = parts[0].strip()
-        codepoints = codepoints_str.split()
-        status = parts[1].strip()
-
-        # Process Glyph & Name
-        tks = right.split(" ", 1)
-        emoji_glyph = tks[0].strip()
-        emoji_name = tks[1].strip() if len(tks) > 1 else ""
-
-        emoji_obj = {  # Build emoji dictionary entry
-          "codepoints": codepoints,
-          "status": status,
-          "emoji": emoji_glyph,
-          "name": emoji_name,
-        }
-
-        if curr_group and curr_subgroup:  # Add emoji to db
-          emoji_db[curr_group][curr_subgroup].append(emoji_obj)
-
-      except Exception as e:
-        print(f"Error parsing line: {line}")
-        print(f"Error: {e}")
-        continue
+      m = EMOJI_LINE_RE.match(line)
+      if not m:
+        continue  # Skip invalid lines
+      codepoints_str, status, emoji_glyph, emoji_name = m.groups()
 
-  # print(
-  #   # json.dumps(emoji_db, indent=2)
-  # )  # This will give you a nice, formatted view of the emoji_db
-  return emoji_db
+      emoji_obj = Emoji(  # Build emoji entry
+        codepoints=codepoints_str.split(),
+        status=sys.intern(status),  # Shared by thousands of entries
+        emoji=emoji_glyph,
+        name=emoji_name or "",
+      )
 
+      if curr_group and curr_subgroup:  # Emit emoji entry
+        yield curr_group, curr_subgroup, emoji_obj
 
-def parse_unicode_data(filename):
-  unicode_db = {}
 
-  with open(filename, encoding="utf-8") as f:
+def parse_unicode_data(filename):
+  # Yield only the columns stored in SQLite:
+  # (code_point, name, general_category, decomposition, numeric_value,
+  #  uppercase_mapping, lowercase_mapping, titlecase_mapping)
+  with open(filename, encoding="utf-8", buffering=READ_BUFFER_SIZE) as f:
     for line in f:
       # Split the line by semicolons, remove leading/trailing whitespaces
       fields = line.strip().split(";")
@@ -105,45 +125,16 @@ def parse_unicode_data(filename):
       if len(fields) < 15:
         continue
 
-      # Extract all fields
-      code_point = fields[0]
-      name = fields[1]
-      general_category = fields[2]
-      canonical_combining_class = fields[3]
-      bidirectional_category = fields[4]
-      decomposition = fields[5]
-      decimal_digit_value = fields[6]
-      digit_value = fields[7]
-      numeric_value = fields[8]
-      mirrored = fields[9]
-      unicode_1_0_name = fields[10]
-      iso_10646_comment = fields[11]
-      uppercase_mapping = fields[12]
-      lowercase_mapping = fields[13]
-      titlecase_mapping = fields[14]
-
-      # Store the data for the Unicode character in the dictionary
-      unicode_db[code_point] = {
-        "name": name,
-        "general_category": general_category,
-        "canonical_combining_class": canonical_combining_class,
-        "bidirectional_category": bidirectional_category,
-        "decomposition": decomposition,
-        "decimal_digit_value": decimal_digit_value,
-        "digit_value": digit_value,
-        "numeric_value": numeric_value,
-        "mirrored": mirrored,
-        "unicode_1_0_name": unicode_1_0_name,
-        "iso_10646_comment": iso_10646_comment,
-        "uppercase_mapping": uppercase_mapping,
-        "lowercase_mapping": lowercase_mapping,
-        "titlecase_mapping": titlecase_mapping,
-      }
-
-  # Print the parsed data in a formatted way
-  # print(json.dumps(unicode_db, indent=2))
-
-  return unicode_db
+      yield (
+        fields[0],  # code_point
+        fields[1],  # name
+        fields[2],  # general_category
+        fields[5],  # decomposition
+        fields[8],  # numeric_value
+        fields[12],  # uppercase_mapping
+        fields[13],  # lowercase_mapping
+        fields[14],  # titlecase_mapping
+      )
 
 
 # ************************************************************************** //
@@ -151,18 +142,36 @@ def parse_unicode_data(filename):
 # ************************************************************************** //
 
 
+def is_up_to_date(target, *sources):
+  # A build artifact is fresh when it is at least as new as all its sources
+  if not os.path.exists(target):
+    return False
+  target_mtime = os.path.getmtime(target)
+  return all(target_mtime >= os.path.getmtime(src) for src in sources)
+
+
 def setup_database(emojis, unicode_data):
   db_filename = "db/unicode.db"
   os.makedirs(os.path.dirname(db_filename), exist_ok=True)
-  conn = sqlite3.connect(db_filename)
+  # Build into a fresh file and swap it in once complete
+  new_db_filename = db_filename + ".new"
+  if os.path.exists(new_db_filename):
+    os.remove(new_db_filename)  # Leftover from an interrupted build
+  conn = sqlite3.connect(new_db_filename)
   cursor = conn.cursor()
 
+  # The DB is rebuilt from scratch, so trade durability for build speed
+  cursor.execute("PRAGMA synchronous = OFF")
+  cursor.execute("PRAGMA journal_mode = MEMORY")
+  cursor.execute("BEGIN")
+
   # Create tables
   cursor.execute("""
         CREATE TABLE IF NOT EXISTS emojis (
+            id INTEGER PRIMARY KEY,
             group_name TEXT,
             subgroup_name TEXT,
-            codepoints TEXT,
+            codepoints TEXT UNIQUE,
             status TEXT,
             emoji TEXT,
             name TEXT
@@ -183,66 +192,99 @@ def setup_database(emojis, unicode_data):
     """)
 
   # Insert emojis
-  for group_name, subgroups in emojis.items():
-    for subgroup_name, emoji_list in subgroups.items():
-      for emoji in emoji_list:
-        cursor.execute(
-          """
-                INSERT INTO emojis (group_name, subgroup_name, codepoints, status, emoji, name)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-          (
-            group_name,
-            subgroup_name,
-            " ".join(emoji["codepoints"]),
-            emoji["status"],
-            emoji["emoji"],
-            emoji["name"],
-          ),
-        )
+  cursor.executemany(
+    """
+        INSERT OR REPLACE INTO emojis (
+            group_name, subgroup_name, codepoints, status, emoji, name
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    (
+      (
+        group_name,
+        subgroup_name,
+        " ".join(emoji.codepoints),
+        emoji.status,
+        emoji.emoji,
+        emoji.name,
+      )
+      for group_name, subgroup_name, emoji in emojis
+      if emoji is not None  # Skip group/subgroup header events
+    ),
+  )
 
   # Insert Unicode data
-  for code_point, entry in unicode_data.items():
-    cursor.execute(
-      """
-            INSERT OR REPLACE INTO unicode_data (
-                code_point, name, general_category, decomposition, numeric_value,
-                uppercase_mapping, lowercase_mapping, titlecase_mapping
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-      (
-        code_point,
-        entry["name"],
-        entry["general_category"],
-        entry["decomposition"],
-        entry["numeric_value"],
-        entry["uppercase_mapping"],
-        entry["lowercase_mapping"],
-        entry["titlecase_mapping"],
-      ),
-    )
+  cursor.executemany(
+    """
+        INSERT OR REPLACE INTO unicode_data (
+            code_point, name, general_category, decomposition, numeric_value,
+            uppercase_mapping, lowercase_mapping, titlecase_mapping
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    unicode_data,
+  )
+
+  # Index once after the bulk insert instead of updating it on every row
+  cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_emojis_group
+        ON emojis (group_name, subgroup_name)
+    """)
 
   conn.commit()
   conn.close()
+  os.replace(new_db_filename, db_filename)
   print(f"Database created: {db_filename}")
 
 
+def save_db_as_json(emojis, out_filename):
+  # Indentation needs the whole tree, so build it from the parse events.
+  # Repeated group/subgroup headers merge into the existing entry
+  db = {}
+  for group_name, subgroup_name, emoji in emojis:
+    subgroups = db.setdefault(group_name, {})
+    if subgroup_name is not None:
+      entries = subgroups.setdefault(subgroup_name, [])
+      if emoji is not None:
+        entries.append(emoji._asdict())
+
+  os.makedirs(os.path.dirname(out_filename), exist_ok=True)
+  part_filename = out_filename + ".part"
+  if orjson is not None:  # Native encoder, much faster than stdlib json
+    with open(part_filename, "wb") as f:
+      f.write(
+        orjson.dumps(db, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+      )
+  else:
+    with open(part_filename, "w", encoding="utf-8") as f:
+      json.dump(db, f, indent=2, ensure_ascii=False)
+      f.write("\n")
+  os.replace(part_filename, out_filename)
+  print(f"JSON database created: {out_filename}")
+
+
+def save_picker_lines(cursor, out_filename):
+  part_filename = out_filename + ".part"
+  with open(part_filename, "w", encoding="utf-8") as f:
+    f.writelines(row[0] + "\n" for row in cursor)
+  os.replace(part_filename, out_filename)
+
+
 # ************************************************************************** //
 #                                   Picker                                   //
 # ************************************************************************** //
 
 
-def pick(emoji_lines):
+def pick(lines_filename):
   try:
-    proc = subprocess.Popen(
-      ["fzf", "--prompt", "Select > "],
-      stdin=subprocess.PIPE,
-      stdout=subprocess.PIPE,
-      stderr=subprocess.PIPE,
-      text=True,
-    )
-    input_data = "\n".join(emoji_lines)
-    stdout, _ = proc.communicate(input_data)
+    # Hand the cached lines file to fzf as stdin, no Python-side copying
+    with open(lines_filename, encoding="utf-8") as lines_file:
+      proc = subprocess.Popen(
+        ["fzf", "--prompt", "Select > "],
+        stdin=lines_file,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+      )
+      stdout, _ = proc.communicate()
     selected_line = stdout.strip()
     if selected_line:
       return selected_line.split()[0]
@@ -256,24 +298,57 @@ def pick(emoji_lines):
 # ************************************************************************** //
 
 if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="CLI based Emoji Picker")
+  parser.add_argument(
+    "--force-rebuild",
+    action="store_true",
+    help="Re-parse source files and rebuild the database even if up-to-date",
+  )
+  parser.add_argument(
+    "--pretty",
+    action="store_true",
+    help="Export the emoji database as pretty-printed JSON (db/emoji_db.json)",
+  )
+  args = parser.parse_args()
+
   # UTF8Writer = codecs.getwriter('utf8')
   # sys.stdout = UTF8Writer(sys.stdout)
   # Handle Emoji Data
   emoji_test_url = "https://unicode.org/Public/emoji/latest/emoji-test.txt"
   emoji_test_filename = ".temp/emoji-test.txt"
-  download_file(emoji_test_url, emoji_test_filename)
 
   # Handle Unicode Data
   unicode_data_url = "https://unicode.org/Public/UCD/latest/ucd/UnicodeData.txt"
   unicode_data_filename = ".temp/UnicodeData.txt"
-  download_file(unicode_data_url, unicode_data_filename)
 
-  # Parse data
-  emojis = parse_emoji_test(emoji_test_filename)
-  unicode_data = parse_unicode_data(unicode_data_filename)
+  # Downloads are independent and I/O-bound, so fetch them concurrently
+  downloads = [
+    (emoji_test_url, emoji_test_filename),
+    (unicode_data_url, unicode_data_filename),
+  ]
+  with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+    futures = [executor.submit(download_file, url, fn) for url, fn in downloads]
+    for future in futures:
+      future.result()  # Re-raise any download error
 
-  # Setup SQLite database
-  setup_database(emojis, unicode_data)
+  db_filename = "db/unicode.db"
+  if not args.force_rebuild and is_up_to_date(
+    db_filename, emoji_test_filename, unicode_data_filename
+  ):
+    print(f"Database {db_filename} is up-to-date. Skipping rebuild.")
+  else:
+    # Parse data straight into the SQLite database
+    setup_database(
+      parse_emoji_test(emoji_test_filename),
+      parse_unicode_data(unicode_data_filename),
+    )
+
+  # The JSON export is for human inspection only; the picker reads SQLite
+  emoji_json_filename = "db/emoji_db.json"
+  if args.pretty and (
+    args.force_rebuild or not is_up_to_date(emoji_json_filename, emoji_test_filename)
+  ):
+    save_db_as_json(parse_emoji_test(emoji_test_filename), emoji_json_filename)
 
   # Prompt the user to pick a database
   print("""
@@ -283,32 +358,32 @@ Select DB:"
   """)
   choice = input("Enter 1 or 2: ").strip()
 
-  conn = sqlite3.connect("db/unicode.db")
-  cursor = conn.cursor()
-
+  # Picker lines are formatted inside SQLite and cached next to the database
   if choice == "1":
-    cursor.execute("""
-          SELECT group_name, subgroup_name, emoji, name FROM emojis
-      """)
-    rows = cursor.fetchall()
-    # lines = [f"{row[2]} {row[3]} [{row[0]} / {row[1]}]" for row in rows]
-    lines = [f"{chr(int(row[0], 16))} {row[1]} (U+{row[0]})" for row in rows]
+    picker_lines_filename = "db/picker_emojis.txt"
+    picker_query = """
+          SELECT emoji || ' ' || name
+                 || ' [' || group_name || ' / ' || subgroup_name || ']'
+          FROM emojis ORDER BY id
+      """
   elif choice == "2":
-    cursor.execute("""
-          SELECT code_point, name FROM unicode_data
-      """)
-    rows = cursor.fetchall()
-    # Convert code points to the actual Unicode glyph
-    # lines = [f"{chr(int(row[0], 16))} {row[1]} (U+{row[0]})" for row in rows]
-    lines = [f"{row[0]} {row[1]}" for row in rows]
+    picker_lines_filename = "db/picker_unicode.txt"
+    picker_query = """
+          SELECT code_point || ' ' || name FROM unicode_data
+      """
   else:
     print("Invalid choice. Exiting.")
     exit()
 
-  picked = pick(lines)
-  conn.close()
+  if not is_up_to_date(picker_lines_filename, db_filename):
+    conn = sqlite3.connect(db_filename)
+    save_picker_lines(conn.execute(picker_query), picker_lines_filename)
+    conn.close()
+
+  picked = pick(picker_lines_filename)
 
   if picked:
-    print(chr(int(picked, 16)))
+    # Emoji lines start with the glyph itself, Unicode lines with a code point
+    print(picked if choice == "1" else chr(int(picked, 16)))
   else:
     print("No selection made.")